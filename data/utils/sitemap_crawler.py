@@ -1,14 +1,113 @@
 import requests
 from bs4 import BeautifulSoup
-import json
+from lxml import etree
+import orjson
+import gc
 import time
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Set
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 
+# libxml2 parses sitemaps directly; recover=True keeps the leniency BS4 had
+# towards slightly malformed feeds.
+XML_PARSER = etree.XMLParser(recover=True, remove_comments=True)
+
+
+
+def compile_patterns(patterns):
+    """One alternation regex for a set of plain substrings (None if empty)"""
+    return re.compile('|'.join(re.escape(p) for p in patterns)) if patterns else None
+
+
+# URLs that are never articles: media/static files and account/feed pages.
+# Plain substring semantics, matched in one scan per URL.
+SKIP_URL_RE = compile_patterns((
+    '.jpg', '.png', '.gif', '.pdf', '.mp4', '.zip', '.css', '.js',
+    '/author/', '/user/', '/admin/', '/login', '/register', '/wp-admin', '/feed', '/rss'
+))
+
+# Article URL rules per site: (site name substring, include patterns, exclude
+# patterns), compiled once. The first rule whose name matches wins.
+SITE_URL_RULES = [
+    (name, compile_patterns(include), compile_patterns(exclude))
+    for name, include, exclude in (
+        ('daily star', ('/news/', '/sports/', '/entertainment/', '/business/', '/opinion/'),
+         ('/category/', '/tag/')),
+        ('prothom alo', ('/article/', '/sports/', '/entertainment/', '/opinion/', '/politics/'), ()),
+        ('dhaka tribune', ('/article/', '/news/', '/sports/', '/business/', '/opinion/'), ()),
+        ('bangla tribune', ('/news/', '/article/', '/sports/', '/entertainment/'), ()),
+        ('new age', ('/article/', '/news/', '/sports/', '/entertainment/'), ()),
+    )
+]
+GENERIC_URL_RULE = (compile_patterns(('/article/', '/news/', '/story/', '/post/', '/blog/')), None)
+
+
+def get_url_rule(site_name):
+    """(include_re, exclude_re) for a site, falling back to the generic rule"""
+    site_name = site_name.lower()
+    for name, include_re, exclude_re in SITE_URL_RULES:
+        if name in site_name:
+            return include_re, exclude_re
+    return GENERIC_URL_RULE
+
+
+# Article extraction selectors, tried in order
+CONTENT_SELECTORS = (
+    'article', 'div.story-content', 'div.article-body', '.entry-content',
+    'main', 'div[class*="content"]', 'div[class*="story"]', '.details'
+)
+DATE_SELECTORS = (
+    'meta[property="article:published_time"]',
+    'meta[name="publish_date"]',
+    'time',
+    '.publish-date',
+    '.date',
+    '.article-date'
+)
+WS_RE = re.compile(r'\s+')
+
+# Concurrent article fetches per site; each worker still pauses between its
+# own requests, so the host sees at most this many requests in flight.
+MAX_WORKERS = 8
+
+
+def parse_xml(content):
+    """Parse sitemap bytes into an lxml root element (None if unparseable)"""
+    return etree.fromstring(content, XML_PARSER)
+
+
+def append_jsonl(path, records):
+    """Append records to a JSON-Lines file, one article per line"""
+    with open(path, 'ab') as f:
+        f.writelines(orjson.dumps(record) + b"\n" for record in records)
+
+
+def load_jsonl(path):
+    with open(path, 'rb') as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+
+def load_site_articles(output_file):
+    """
+    Load one site's crawled articles for the merge, or None if the site has
+    no output yet. Sites crawled before the switch to JSONL checkpoints only
+    have the legacy '*_sitemap.json' array file; read that when the .jsonl
+    file is missing so older crawls still make it into the merged corpus.
+    """
+    if os.path.exists(output_file):
+        return load_jsonl(output_file)
+
+    legacy_file = os.path.splitext(output_file)[0] + '.json'
+    if os.path.exists(legacy_file):
+        with open(legacy_file, 'rb') as f:
+            return orjson.loads(f.read())
+
+    return None
+
 
 class AdvancedSitemapCrawler:
     def __init__(self):
@@ -19,6 +118,8 @@ class AdvancedSitemapCrawler:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # URLs already scheduled in this run, shared by every crawl_site call
+        self.seen_urls: Set[str] = set()
 
     def parse_sitemap_index(self, sitemap_url: str) -> List[str]:
         """Parse sitemap index to get child sitemap URLs"""
@@ -27,13 +128,11 @@ class AdvancedSitemapCrawler:
             response = self.session.get(sitemap_url, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'xml')
-            sitemap_tags = soup.find_all('sitemap')
+            root = parse_xml(response.content)
 
             child_sitemaps = []
-            for sitemap in sitemap_tags:
-                loc = sitemap.find('loc')
-                if loc and loc.text:
+            for loc in root.iterfind('.//{*}sitemap/{*}loc'):
+                if loc.text and loc.text.strip():
                     child_sitemaps.append(loc.text.strip())
 
             print(f"    Found {len(child_sitemaps)} child sitemaps")
@@ -49,33 +148,18 @@ class AdvancedSitemapCrawler:
             response = self.session.get(sitemap_url, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'xml')
-            url_tags = soup.find_all('url')
+            root = parse_xml(response.content)
 
             urls_data = []
-            for url_tag in url_tags:
-                loc = url_tag.find('loc')
-                if loc and loc.text:
-                    url_data = {
-                        'url': loc.text.strip(),
-                        'lastmod': '',
-                        'changefreq': '',
-                        'priority': ''
-                    }
-
-                    lastmod = url_tag.find('lastmod')
-                    if lastmod and lastmod.text:
-                        url_data['lastmod'] = lastmod.text.strip()
-
-                    changefreq = url_tag.find('changefreq')
-                    if changefreq and changefreq.text:
-                        url_data['changefreq'] = changefreq.text.strip()
-
-                    priority = url_tag.find('priority')
-                    if priority and priority.text:
-                        url_data['priority'] = priority.text.strip()
-
-                    urls_data.append(url_data)
+            for url_tag in root.iterfind('.//{*}url'):
+                loc = url_tag.findtext('{*}loc')
+                if loc and loc.strip():
+                    urls_data.append({
+                        'url': loc.strip(),
+                        'lastmod': (url_tag.findtext('{*}lastmod') or '').strip(),
+                        'changefreq': (url_tag.findtext('{*}changefreq') or '').strip(),
+                        'priority': (url_tag.findtext('{*}priority') or '').strip()
+                    })
 
             return urls_data
 
@@ -90,10 +174,11 @@ class AdvancedSitemapCrawler:
         # Step 1: Check if it's a sitemap index
         try:
             response = self.session.get(base_sitemap_url, timeout=15)
-            soup = BeautifulSoup(response.content, 'xml')
+            root = parse_xml(response.content)
+            root_name = etree.QName(root).localname if root is not None else ''
 
             # Check if it's a sitemap index
-            if soup.find('sitemapindex'):
+            if root_name == 'sitemapindex':
                 print("  Detected: Sitemap Index")
                 child_sitemaps = self.parse_sitemap_index(base_sitemap_url)
 
@@ -113,7 +198,7 @@ class AdvancedSitemapCrawler:
                 return all_urls
 
             # If it's a regular sitemap
-            elif soup.find('urlset'):
+            elif root_name == 'urlset':
                 print("  Detected: Regular Sitemap")
                 return self.parse_sitemap_urls(base_sitemap_url)[:max_urls]
 
@@ -128,55 +213,18 @@ class AdvancedSitemapCrawler:
     def filter_article_urls(self, urls_data: List[Dict], site_config: Dict) -> List[Dict]:
         """Filter URLs to get only article pages"""
         filtered = []
+        include_re, exclude_re = get_url_rule(site_config['name'])
 
         for url_data in urls_data:
             url = url_data['url'].lower()
 
-            # Skip non-HTML pages
-            if any(ext in url for ext in ['.jpg', '.png', '.gif', '.pdf', '.mp4', '.zip', '.css', '.js']):
-                continue
-
-            # Skip admin/login/author pages
-            if any(pattern in url for pattern in
-                   ['/author/', '/user/', '/admin/', '/login', '/register', '/wp-admin', '/feed', '/rss']):
+            # Skip non-HTML pages and admin/login/author pages
+            if SKIP_URL_RE.search(url):
                 continue
 
             # Site-specific filtering
-            site_name = site_config['name']
-
-            if 'daily star' in site_name.lower():
-                # Daily Star patterns
-                if any(pattern in url for pattern in
-                       ['/news/', '/sports/', '/entertainment/', '/business/', '/opinion/']):
-                    if not any(pattern in url for pattern in ['/category/', '/tag/']):
-                        filtered.append(url_data)
-
-            elif 'prothom alo' in site_name.lower():
-                # Prothom Alo patterns
-                if '/article/' in url or any(
-                        pattern in url for pattern in ['/sports/', '/entertainment/', '/opinion/', '/politics/']):
-                    filtered.append(url_data)
-
-            elif 'dhaka tribune' in site_name.lower():
-                # Dhaka Tribune patterns
-                if '/article/' in url or any(
-                        pattern in url for pattern in ['/news/', '/sports/', '/business/', '/opinion/']):
-                    filtered.append(url_data)
-
-            elif 'bangla tribune' in site_name.lower():
-                # Bangla Tribune patterns
-                if any(pattern in url for pattern in ['/news/', '/article/', '/sports/', '/entertainment/']):
-                    filtered.append(url_data)
-
-            elif 'new age' in site_name.lower():
-                # New Age patterns
-                if '/article/' in url or any(pattern in url for pattern in ['/news/', '/sports/', '/entertainment/']):
-                    filtered.append(url_data)
-
-            else:
-                # Generic filtering
-                if any(pattern in url for pattern in ['/article/', '/news/', '/story/', '/post/', '/blog/']):
-                    filtered.append(url_data)
+            if include_re.search(url) and not (exclude_re and exclude_re.search(url)):
+                filtered.append(url_data)
 
         return filtered
 
@@ -189,7 +237,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.thedailystar.net',
             'sitemap_url': 'https://www.thedailystar.net/sitemap.xml',
             'language': 'en',
-            'output_file': 'data/raw/english/dailystar_sitemap.json',
+            'output_file': 'data/raw/english/dailystar_sitemap.jsonl',
             'max_articles': 1500,
             'description': 'Leading English newspaper in Bangladesh'
         },
@@ -198,7 +246,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.dhakatribune.com',
             'sitemap_url': 'https://www.dhakatribune.com/sitemap.xml',
             'language': 'en',
-            'output_file': 'data/raw/english/dhakatribune_sitemap.json',
+            'output_file': 'data/raw/english/dhakatribune_sitemap.jsonl',
             'max_articles': 1200,
             'description': 'English daily newspaper'
         },
@@ -207,7 +255,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.newagebd.net',
             'sitemap_url': 'https://www.newagebd.net/sitemap.xml',
             'language': 'en',
-            'output_file': 'data/raw/english/newage_sitemap.json',
+            'output_file': 'data/raw/english/newage_sitemap.jsonl',
             'max_articles': 1000,
             'description': 'English newspaper'
         },
@@ -216,7 +264,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.daily-sun.com',
             'sitemap_url': 'https://www.daily-sun.com/sitemap.xml',  # May not exist
             'language': 'en',
-            'output_file': 'data/raw/english/dailysun_sitemap.json',
+            'output_file': 'data/raw/english/dailysun_sitemap.jsonl',
             'max_articles': 800,
             'description': 'English tabloid'
         },
@@ -225,7 +273,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.dailynewnation.com',
             'sitemap_url': 'https://www.dailynewnation.com/sitemap.xml',  # May not exist
             'language': 'en',
-            'output_file': 'data/raw/english/newnation_sitemap.json',
+            'output_file': 'data/raw/english/newnation_sitemap.jsonl',
             'max_articles': 700,
             'description': 'English newspaper'
         }
@@ -236,7 +284,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.prothomalo.com',
             'sitemap_url': 'https://www.prothomalo.com/sitemap.xml',
             'language': 'bn',
-            'output_file': 'data/raw/bangla/prothomalo_sitemap.json',
+            'output_file': 'data/raw/bangla/prothomalo_sitemap.jsonl',
             'max_articles': 1500,
             'description': 'Largest circulated Bangla newspaper'
         },
@@ -245,7 +293,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.banglatribune.com',
             'sitemap_url': 'https://www.banglatribune.com/sitemap.xml',
             'language': 'bn',
-            'output_file': 'data/raw/bangla/banglatribune_sitemap.json',
+            'output_file': 'data/raw/bangla/banglatribune_sitemap.jsonl',
             'max_articles': 1200,
             'description': 'Bangla online newspaper'
         },
@@ -254,7 +302,7 @@ SITE_CONFIGS = {
             'base_url': 'https://bangla.bdnews24.com',
             'sitemap_url': 'https://bangla.bdnews24.com/sitemap.xml',  # May not exist
             'language': 'bn',
-            'output_file': 'data/raw/bangla/bdnews24_sitemap.json',
+            'output_file': 'data/raw/bangla/bdnews24_sitemap.jsonl',
             'max_articles': 1000,
             'description': 'Bangla news portal'
         },
@@ -263,7 +311,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.kalerkantho.com',
             'sitemap_url': 'https://www.kalerkantho.com/sitemap.xml',  # May not exist
             'language': 'bn',
-            'output_file': 'data/raw/bangla/kalerkantho_sitemap.json',
+            'output_file': 'data/raw/bangla/kalerkantho_sitemap.jsonl',
             'max_articles': 800,
             'description': 'Bangla newspaper'
         },
@@ -272,7 +320,7 @@ SITE_CONFIGS = {
             'base_url': 'https://www.dhakapost.com',
             'sitemap_url': 'https://www.dhakapost.com/sitemap.xml',  # May not exist
             'language': 'bn',
-            'output_file': 'data/raw/bangla/dhakapost_sitemap.json',
+            'output_file': 'data/raw/bangla/dhakapost_sitemap.jsonl',
             'max_articles': 700,
             'description': 'Bangla news portal'
         }
@@ -308,13 +356,8 @@ def extract_article_content(soup, url, language):
             return None
 
         # Content - try multiple selectors
-        content_selectors = [
-            'article', 'div.story-content', 'div.article-body', '.entry-content',
-            'main', 'div[class*="content"]', 'div[class*="story"]', '.details'
-        ]
-
         content_text = ""
-        for selector in content_selectors:
+        for selector in CONTENT_SELECTORS:
             content_div = soup.select_one(selector)
             if content_div:
                 # Get paragraphs
@@ -340,16 +383,7 @@ def extract_article_content(soup, url, language):
 
         # Date
         date = ""
-        date_selectors = [
-            'meta[property="article:published_time"]',
-            'meta[name="publish_date"]',
-            'time',
-            '.publish-date',
-            '.date',
-            '.article-date'
-        ]
-
-        for selector in date_selectors:
+        for selector in DATE_SELECTORS:
             date_elem = soup.select_one(selector)
             if date_elem:
                 if date_elem.get('content'):
@@ -362,8 +396,8 @@ def extract_article_content(soup, url, language):
                     break
 
         # Clean text
-        title = re.sub(r'\s+', ' ', title).strip()
-        content_text = re.sub(r'\s+', ' ', content_text).strip()
+        title = WS_RE.sub(' ', title).strip()
+        content_text = WS_RE.sub(' ', content_text).strip()
 
         # Token count
         if language == 'en':
@@ -389,6 +423,32 @@ def extract_article_content(soup, url, language):
         return None
 
 
+def fetch_article(crawler, url, language):
+    """Fetch and extract one article (runs in a worker thread).
+
+    Only the extracted dict leaves this function; the response body and
+    the parse tree are released before returning.
+    """
+    try:
+        response = crawler.session.get(url, timeout=20)
+        status, content = response.status_code, response.content
+        response.close()
+        del response
+        if status != 200:
+            return None
+
+        soup = BeautifulSoup(content, 'lxml')
+        del content
+        try:
+            return extract_article_content(soup, url, language)
+        finally:
+            # The tree is full of parent/child reference cycles that would
+            # otherwise wait for the cyclic GC; tear it down now.
+            soup.decompose()
+    finally:
+        time.sleep(0.3)  # Polite delay
+
+
 def crawl_site(site_config, crawler):
     """Crawl a single site using sitemap"""
     print(f"\n{'=' * 70}")
@@ -410,55 +470,71 @@ def crawl_site(site_config, crawler):
     article_urls = crawler.filter_article_urls(all_urls, site_config)
     print(f"  Article URLs after filtering: {len(article_urls)}")
 
+    # Drop URLs already crawled in this run (overlapping sitemaps/categories)
+    # before fetching, so duplicates cost no network round-trip
+    new_urls = []
+    for url_data in article_urls:
+        if url_data['url'] not in crawler.seen_urls:
+            crawler.seen_urls.add(url_data['url'])
+            new_urls.append(url_data)
+    print(f"  New URLs (not seen this run): {len(new_urls)}")
+
     # Limit to max articles
-    article_urls = article_urls[:site_config['max_articles']]
+    article_urls = new_urls[:site_config['max_articles']]
     print(f"  Will crawl: {len(article_urls)} articles")
 
     # Crawl articles
     print(f"\nStep 3: Crawling articles...")
     articles = []
+    saved = 0
 
-    for idx, url_data in enumerate(article_urls):
-        try:
-            if idx % 50 == 0:
-                print(f"  Progress: {idx}/{len(article_urls)}")
+    # Start a fresh per-site file; checkpoints only append new articles
+    open(site_config['output_file'], 'wb').close()
 
-            url = url_data['url']
-            print(f"    [{idx + 1}] {url[:80]}...")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(fetch_article, crawler, url_data['url'], site_config['language']): idx
+            for idx, url_data in enumerate(article_urls)
+        }
 
-            response = crawler.session.get(url, timeout=20)
-            if response.status_code != 200:
-                continue
+        for done, future in enumerate(as_completed(futures)):
+            idx = futures[future]
+            url_data = article_urls[idx]
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            if done % 50 == 0:
+                print(f"  Progress: {done}/{len(article_urls)}")
 
-            article = extract_article_content(soup, url, site_config['language'])
+            if done and done % 200 == 0:
+                gc.collect()
 
-            if article:
-                article[
-                    'doc_id'] = f"{site_config['language']}_{site_config['name'].lower().replace(' ', '_')}_{idx:06d}"
-                article['site'] = site_config['name']
-                article['lastmod'] = url_data.get('lastmod', '')
-                articles.append(article)
+            print(f"    [{idx + 1}] {url_data['url'][:80]}...")
 
-                print(f"      ✓ {article['title'][:50]}...")
-                print(f"      ✓ Tokens: {article['token_count']}")
+            try:
+                article = future.result()
+            except Exception as e:
+                print(f"      ✗ Error: {e}")
+                continue
 
-            # Save progress every 50 articles
-            if len(articles) > 0 and len(articles) % 50 == 0:
-                with open(site_config['output_file'], 'w', encoding='utf-8') as f:
-                    json.dump(articles, f, ensure_ascii=False, indent=2)
-                print(f"      💾 Saved {len(articles)} articles")
+            if not article:
+                continue
 
-            time.sleep(0.3)  # Polite delay
+            article[
+                'doc_id'] = f"{site_config['language']}_{site_config['name'].lower().replace(' ', '_')}_{idx:06d}"
+            article['site'] = site_config['name']
+            article['lastmod'] = url_data.get('lastmod', '')
+            articles.append(article)
 
-        except Exception as e:
-            print(f"      ✗ Error: {e}")
-            time.sleep(1)
+            print(f"      ✓ {article['title'][:50]}...")
+            print(f"      ✓ Tokens: {article['token_count']}")
+
+            # Save progress every 50 articles
+            if len(articles) - saved >= 50:
+                append_jsonl(site_config['output_file'], articles[saved:])
+                saved = len(articles)
+                print(f"      💾 Saved {saved} articles")
 
     # Final save
-    with open(site_config['output_file'], 'w', encoding='utf-8') as f:
-        json.dump(articles, f, ensure_ascii=False, indent=2)
+    append_jsonl(site_config['output_file'], articles[saved:])
 
     print(f"\n✅ {site_config['name']}: {len(articles)} articles saved")
     return len(articles)
@@ -542,40 +618,39 @@ def main():
     # Merge English
     english_articles = []
     for site_config in SITE_CONFIGS['english']:
-        if os.path.exists(site_config['output_file']):
-            with open(site_config['output_file'], 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                english_articles.extend(data)
-                print(f"✓ {site_config['name']}: {len(data)} articles")
+        data = load_site_articles(site_config['output_file'])
+        if data is not None:
+            # Workers finish out of order; restore sitemap order
+            data.sort(key=lambda a: a['doc_id'])
+            english_articles.extend(data)
+            print(f"✓ {site_config['name']}: {len(data)} articles")
 
     # Merge Bangla
     bangla_articles = []
     for site_config in SITE_CONFIGS['bangla']:
-        if os.path.exists(site_config['output_file']):
-            with open(site_config['output_file'], 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                bangla_articles.extend(data)
-                print(f"✓ {site_config['name']}: {len(data)} articles")
+        data = load_site_articles(site_config['output_file'])
+        if data is not None:
+            # Workers finish out of order; restore sitemap order
+            data.sort(key=lambda a: a['doc_id'])
+            bangla_articles.extend(data)
+            print(f"✓ {site_config['name']}: {len(data)} articles")
 
     # Remove duplicates
     def remove_duplicates(articles):
-        seen_urls = set()
-        unique = []
+        unique = {}
         for article in articles:
-            if article['url'] not in seen_urls:
-                seen_urls.add(article['url'])
-                unique.append(article)
-        return unique
+            unique.setdefault(article['url'], article)
+        return list(unique.values())
 
     english_articles = remove_duplicates(english_articles)
     bangla_articles = remove_duplicates(bangla_articles)
 
     # Save merged files
-    with open('data/processed/english_docs.json', 'w', encoding='utf-8') as f:
-        json.dump(english_articles, f, ensure_ascii=False, indent=2)
+    with open('data/processed/english_docs.json', 'wb') as f:
+        f.write(orjson.dumps(english_articles))
 
-    with open('data/processed/bangla_docs.json', 'w', encoding='utf-8') as f:
-        json.dump(bangla_articles, f, ensure_ascii=False, indent=2)
+    with open('data/processed/bangla_docs.json', 'wb') as f:
+        f.write(orjson.dumps(bangla_articles))
 
     end_time = time.time()
     duration = (end_time - start_time) / 60  # minutes
@@ -1,8 +1,14 @@
 import json
+import mmap
 import os
 import re
 import pickle
-from rank_bm25 import BM25Okapi
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import orjson
+from scipy import sparse
 from tqdm import tqdm
 
 # =========================
@@ -11,102 +17,291 @@ from tqdm import tqdm
 ENGLISH_PATH = "../data/processed/english_docs.json"
 BANGLA_PATH = "../data/processed/bangla_docs.json"
 OUTPUT_DIR = "../data/index"
+BM25_DIR = os.path.join(OUTPUT_DIR, "bm25")
+
+# =========================
+# Parallelism
+# =========================
+N_JOBS = os.cpu_count()
+CHUNK_SIZE = 256
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# =========================
+# BM25 Parameters (same defaults as rank_bm25.BM25Okapi)
+# =========================
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
 
 # =========================
 # Text Preprocessing
 # =========================
-def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"<.*?>", " ", text)
-    text = re.sub(r"[^\w\s\u0980-\u09ff]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+# Tokens are pulled out in a single findall pass: a match is either an HTML
+# tag (empty group, dropped) or a run of word/Bangla characters. '<' is not a
+# word character, so a tag is always matched as a whole and the tokens stay
+# identical to the query-side clean_text().split().
+_TOKEN_RE = re.compile(r"<[^>\n]*>|([\w\u0980-\u09ff]+)")
+
+# Pure-ASCII text (most English boilerplate and many whole articles) skips
+# the regex: every ASCII character that is neither a word character nor
+# whitespace becomes a space, and split() does the rest. Without '<' there
+# are no tags to strip, so the result equals the regex path.
+_ASCII_TABLE = str.maketrans({
+    c: " " for c in range(128)
+    if not (chr(c).isalnum() or chr(c) == "_" or chr(c).isspace())
+})
 
 
 def tokenize(text):
-    return clean_text(text).split()
+    if text.isascii() and "<" not in text:
+        return text.lower().translate(_ASCII_TABLE).split()
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t]
+
+
+def tokenize_corpus(texts, executor, vocab, desc=None):
+    """
+    Tokenize many texts into np.int32 term-id arrays, adding new terms to
+    vocab. The regex runs once per unique paragraph: news corpora repeat
+    boilerplate and syndicated paragraphs, and since a newline is always a
+    token boundary, concatenating paragraph tokens gives exactly
+    tokenize(text). Unique paragraphs are independent, so they are spread
+    over the executor's worker processes.
+    """
+    paragraphs = Counter(p for text in texts for p in text.split("\n"))
+    total = sum(paragraphs.values())
+    print(f"   {desc}: {len(paragraphs)} unique of {total} paragraphs")
+
+    unique = list(paragraphs)
+    tokenized = executor.map(tokenize, unique, chunksize=CHUNK_SIZE)
+
+    cache = {}
+    for p, tokens in zip(unique, tqdm(tokenized, total=len(unique), desc=desc)):
+        cache[p] = np.fromiter(
+            (vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int32, count=len(tokens)
+        )
+
+    return [np.concatenate([cache[p] for p in text.split("\n")]) for text in texts]
 
 
 # =========================
 # Safe Text Extractor
 # =========================
+TEXT_KEYS = ["content", "text", "body", "article", "full_text"]
+
+
 def get_text(doc):
     """
     Safely extract article text from different possible keys
     """
-    for key in ["content", "text", "body", "article", "full_text"]:
+    for key in TEXT_KEYS:
         if key in doc and doc[key]:
             return doc[key]
     return ""
 
 
+def source_key(doc):
+    return doc.get("site") or doc.get("source", "")
+
+
+def detect_text_key(docs):
+    """
+    Key holding the article text, taken from the first document that has
+    one. A crawl output file shares one schema, so callers can read
+    doc[key] and only fall back to get_text() for the odd document.
+    """
+    for doc in docs:
+        for key in TEXT_KEYS:
+            if doc.get(key):
+                return key
+    return None
+
+
 # =========================
-# Load Documents
+# BM25 Index (Structure-of-Arrays, CSR by term)
 # =========================
-def load_documents(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+def build_bm25_index(corpus, vocab, k1=K1, b=B, epsilon=EPSILON):
+    """
+    Build a CSR posting layout from per-document term-id arrays: the
+    postings of term t are postings_doc[term_offsets[t]:term_offsets[t + 1]]
+    (with matching postings_tf), sorted by doc id. IDF uses the BM25Okapi
+    epsilon floor.
+    """
+    term_chunks, doc_chunks, tf_chunks = [], [], []
+    doc_len = np.zeros(len(corpus), dtype=np.int32)
+
+    for doc_id, ids in enumerate(corpus):
+        doc_len[doc_id] = len(ids)
+        terms, counts = np.unique(ids, return_counts=True)
+        term_chunks.append(terms)
+        doc_chunks.append(np.full(len(terms), doc_id, dtype=np.int32))
+        tf_chunks.append(counts)
+
+    term_ids = np.concatenate(term_chunks).astype(np.int32)
+    doc_ids = np.concatenate(doc_chunks)
+    tfs = np.concatenate(tf_chunks)
+    # Sort by term, then doc id: each posting list is ascending, so scoring
+    # writes stream forward through the score array and MaxScore can
+    # binary-search a list for one doc.
+    order = np.lexsort((doc_ids, term_ids))
+    postings_doc = doc_ids[order]
+    postings_tf = tfs[order].astype(np.float32)
+
+    df = np.bincount(term_ids, minlength=len(vocab))
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(df, out=term_offsets[1:])
 
+    num_docs = len(corpus)
+    idf = np.log(num_docs - df + 0.5) - np.log(df + 0.5)
+    idf[idf < 0] = epsilon * idf.mean()
 
-print("\n📥 Loading documents...")
-english_docs = load_documents(ENGLISH_PATH)
-bangla_docs = load_documents(BANGLA_PATH)
+    avgdl = float(doc_len.mean())
+    # tf + doc_norm[d] is the whole BM25 denominator, so the scorer only
+    # does one add and one divide per posting.
+    doc_norm = k1 * (1 - b) + (k1 * b / avgdl) * doc_len
+
+    # MaxScore upper bound: the largest contribution any single posting
+    # of a term can make to a document score.
+    contrib = idf[term_ids[order]] * (k1 + 1) * postings_tf / (postings_tf + doc_norm[postings_doc])
+    max_score = np.maximum.reduceat(contrib, term_offsets[:-1])
+
+    # The same contributions as a docs x terms matrix: scoring a batch of
+    # queries is then one sparse matrix product (see LexicalBM25.get_scores_batch).
+    # The postings are already CSC-ordered (column = term, sorted rows = docs).
+    doc_term_scores = sparse.csc_matrix(
+        (contrib.astype(np.float32), postings_doc, term_offsets),
+        shape=(len(corpus), len(vocab))
+    ).tocsr()
+
+    arrays = {
+        "postings_doc": postings_doc,
+        "postings_tf": postings_tf,
+        "term_offsets": term_offsets,
+        "idf": idf.astype(np.float32),
+        "doc_len": doc_len,
+        "doc_norm": doc_norm.astype(np.float32),
+        "max_score": max_score.astype(np.float32),
+    }
+    params = {
+        "k1": k1,
+        "b": b,
+        "epsilon": epsilon,
+        "avgdl": avgdl,
+        "num_docs": num_docs,
+        "num_terms": len(vocab),
+    }
+    return arrays, doc_term_scores, params
+
+
+def save_bm25_index(index_dir, arrays, doc_term_scores, vocab, params):
+    for name, arr in arrays.items():
+        np.save(os.path.join(index_dir, f"{name}.npy"), arr)
+
+    sparse.save_npz(os.path.join(index_dir, "doc_term_scores.npz"), doc_term_scores)
+
+    with open(os.path.join(index_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+
+    with open(os.path.join(index_dir, "params.json"), "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
 
-print(f"✅ English docs: {len(english_docs)}")
-print(f"✅ Bangla docs : {len(bangla_docs)}")
 
 # =========================
-# Prepare Corpus
+# Document Metadata (one list per field, row i = doc i)
 # =========================
-corpus = []
-metadata = []
+LANGUAGES = ["english", "bangla"]
 
-print("\n🧹 Preprocessing documents...")
 
-for doc in tqdm(english_docs, desc="English"):
-    text = get_text(doc)
-    tokens = tokenize(text)
-    if tokens:
-        corpus.append(tokens)
-        metadata.append({
-            "id": doc.get("id", ""),
-            "title": doc.get("title", ""),
-            "source": doc.get("source", ""),
-            "language": "english"
-        })
+def new_metadata():
+    return {"ids": [], "titles": [], "sources": [], "languages": []}
 
-for doc in tqdm(bangla_docs, desc="Bangla"):
-    text = get_text(doc)
-    tokens = tokenize(text)
-    if tokens:
-        corpus.append(tokens)
-        metadata.append({
-            "id": doc.get("id", ""),
-            "title": doc.get("title", ""),
-            "source": doc.get("source", ""),
-            "language": "bangla"
-        })
 
-print(f"\n📊 Total indexed documents: {len(corpus)}")
+def add_metadata(metadata, doc, language):
+    metadata["ids"].append(doc.get("id", ""))
+    metadata["titles"].append(doc.get("title", ""))
+    metadata["sources"].append(doc.get("source", ""))
+    metadata["languages"].append(LANGUAGES.index(language))
+
+
+def save_metadata(path, metadata):
+    data = dict(metadata)
+    data["languages"] = np.asarray(metadata["languages"], dtype=np.uint8)
+    data["language_names"] = LANGUAGES
+    with open(path, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
 
 # =========================
-# BM25 Indexing
+# Load Documents
 # =========================
-print("\n🚀 Building BM25 index...")
-bm25 = BM25Okapi(corpus)
+def load_documents(path):
+    # orjson decodes straight from the mapped file: no read() copy and no
+    # intermediate str of the whole file.
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            docs = orjson.loads(view)
+    return docs, detect_text_key(docs)
+
 
 # =========================
-# Save Index
+# Main Pipeline
 # =========================
-with open(os.path.join(OUTPUT_DIR, "bm25_index.pkl"), "wb") as f:
-    pickle.dump(bm25, f)
+def index_language(path, language, executor, vocab, corpus, metadata):
+    """
+    Load one language's documents, tokenize them and append the non-empty
+    ones to corpus/metadata. The raw documents are dropped on return.
+    """
+    docs, key = load_documents(path)
+    print(f"✅ {language.capitalize()} docs: {len(docs)}")
+
+    # Doc ids follow corpus order: keep each language's documents grouped
+    # by site so similar documents get neighbouring ids and posting lists
+    # stream through contiguous regions of the score array.
+    docs.sort(key=source_key)
+
+    texts = [doc.get(key) or get_text(doc) for doc in docs]
+    doc_tokens = tokenize_corpus(texts, executor, vocab, desc=language.capitalize())
+    del texts
+
+    for doc, tokens in zip(docs, doc_tokens):
+        if len(tokens):
+            corpus.append(tokens)
+            add_metadata(metadata, doc, language)
+
+
+def main():
+    os.makedirs(BM25_DIR, exist_ok=True)
+
+    # ---------- PREPARE CORPUS ----------
+    corpus = []
+    vocab = {}
+    metadata = new_metadata()
+
+    print("\n🧹 Loading and preprocessing documents...")
+
+    # One language at a time: each raw JSON is released before the next is
+    # parsed, so peak memory holds one corpus plus the compact token arrays.
+    with ProcessPoolExecutor(max_workers=N_JOBS) as executor:
+        index_language(ENGLISH_PATH, "english", executor, vocab, corpus, metadata)
+        index_language(BANGLA_PATH, "bangla", executor, vocab, corpus, metadata)
+
+    print(f"\n📊 Total indexed documents: {len(corpus)}")
+
+    # ---------- BM25 INDEXING ----------
+    print("\n🚀 Building BM25 index...")
+    arrays, doc_term_scores, params = build_bm25_index(corpus, vocab)
+    print(f"✅ Vocabulary: {len(vocab)} terms, {len(arrays['postings_doc'])} postings")
+
+    # ---------- SAVE INDEX ----------
+    save_bm25_index(BM25_DIR, arrays, doc_term_scores, vocab, params)
+
+    save_metadata(os.path.join(OUTPUT_DIR, "doc_metadata.pkl"), metadata)
+
+    print("\n✅ BM25 indexing completed!")
+    print("📁 Saved:")
+    print(" - data/index/bm25/*.npy (postings, idf, doc lengths)")
+    print(" - data/index/bm25/doc_term_scores.npz (batch scoring matrix)")
+    print(" - data/index/bm25/vocab.json, params.json")
+    print(" - data/index/doc_metadata.pkl")
 
-with open(os.path.join(OUTPUT_DIR, "doc_metadata.pkl"), "wb") as f:
-    pickle.dump(metadata, f)
 
-print("\n✅ BM25 indexing completed!")
-print("📁 Saved:")
-print(" - data/index/bm25_index.pkl")
-print(" - data/index/doc_metadata.pkl")
+if __name__ == "__main__":
+    main()
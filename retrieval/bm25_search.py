@@ -1,60 +1,75 @@
 import pickle
 import re
+from functools import cache
+
+from lexical_bm25 import LexicalBM25
 
 # =========================
 # Paths
 # =========================
-BM25_PATH = "../data/index/bm25_index.pkl"
+BM25_DIR = "../data/index/bm25"
 META_PATH = "../data/index/doc_metadata.pkl"
 
 # =========================
 # Preprocessing (MUST MATCH INDEXING)
 # =========================
+# Tag and punctuation stripping fused into one precompiled pass ('<' is
+# left out of the punctuation run so tags always match whole, exactly like
+# the old "<.*?>" pass followed by the punctuation pass).
+_CLEAN_RE = re.compile(r"<[^>\n]*>|<|[^\w\s\u0980-\u09ff<]+")
+_WS_RE = re.compile(r"\s+")
+
+# Pure-ASCII queries without tags skip the regex: one str.translate pass
+# maps every ASCII non-word, non-space character to a space.
+_ASCII_TABLE = str.maketrans({
+    c: " " for c in range(128)
+    if not (chr(c).isalnum() or chr(c) == "_" or chr(c).isspace())
+})
+
+
 def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"<.*?>", " ", text)
-    text = re.sub(r"[^\w\s\u0980-\u09ff]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    text = _CLEAN_RE.sub(" ", text.lower())
+    return _WS_RE.sub(" ", text).strip()
 
 
 def tokenize(text):
-    return clean_text(text).split()
+    # split() already collapses whitespace, so skip clean_text's last pass
+    if text.isascii() and "<" not in text:
+        return text.lower().translate(_ASCII_TABLE).split()
+    return _CLEAN_RE.sub(" ", text.lower()).split()
 
 
 # =========================
 # Load Index
 # =========================
-print("\n📦 Loading BM25 index...")
-with open(BM25_PATH, "rb") as f:
-    bm25 = pickle.load(f)
+# Loaded on the first search rather than at import, so modules that only
+# import this one (or never search) don't pay for it.
+@cache
+def load_index():
+    print("\n📦 Loading BM25 index...")
+    bm25 = LexicalBM25(BM25_DIR)
 
-with open(META_PATH, "rb") as f:
-    metadata = pickle.load(f)
+    with open(META_PATH, "rb") as f:
+        metadata = pickle.load(f)
 
-print(f"✅ Loaded {len(metadata)} documents")
+    print(f"✅ Loaded {len(metadata['ids'])} documents")
+    return bm25, metadata
 
 # =========================
 # Search Function
 # =========================
 def bm25_search(query, top_k=10):
+    bm25, metadata = load_index()
     tokens = tokenize(query)
-    scores = bm25.get_scores(tokens)
-
-    ranked = sorted(
-        enumerate(scores),
-        key=lambda x: x[1],
-        reverse=True
-    )
+    doc_ids, scores = bm25.get_top_k(tokens, top_k)
 
     results = []
-    for idx, score in ranked[:top_k]:
-        doc = metadata[idx]
+    for idx, score in zip(doc_ids, scores):
         results.append({
-            "score": round(score, 4),
-            "title": doc["title"],
-            "source": doc["source"],
-            "language": doc["language"]
+            "score": round(float(score), 4),
+            "title": metadata["titles"][idx],
+            "source": metadata["sources"][idx],
+            "language": metadata["language_names"][metadata["languages"][idx]]
         })
 
     return results
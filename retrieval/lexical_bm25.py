@@ -0,0 +1,175 @@
+import json
+import os
+
+import numpy as np
+from numba import njit, prange
+from scipy import sparse
+
+# =========================
+# Index Layout (written by indexing/bm25_indexing.py)
+# =========================
+INDEX_ARRAYS = [
+    "postings_doc", "postings_tf", "term_offsets", "idf", "doc_len", "doc_norm", "max_score"
+]
+
+
+# =========================
+# Scoring Kernel
+# =========================
+@njit(parallel=True, fastmath=True, cache=True)
+def _accumulate_scores(query_terms, term_offsets, postings_doc, postings_tf, idf, doc_norm, k1, scores):
+    # Terms are processed one after another; within a posting list every
+    # doc id is unique, so the parallel loop never writes the same slot twice.
+    for i in range(query_terms.shape[0]):
+        t = query_terms[i]
+        weight = idf[t] * (k1 + 1.0)
+        for j in prange(term_offsets[t], term_offsets[t + 1]):
+            tf = postings_tf[j]
+            d = postings_doc[j]
+            scores[d] += weight * tf / (tf + doc_norm[d])
+
+
+@njit(cache=True)
+def _maxscore_top_k(query_terms, k, term_offsets, postings_doc, postings_tf, idf, doc_norm, max_score, k1):
+    # query_terms must be sorted by descending max_score.
+    num_docs = doc_norm.shape[0]
+    n_terms = query_terms.shape[0]
+
+    # remaining[i] = best score a document can still gain from terms i..end
+    remaining = np.zeros(n_terms + 1, dtype=np.float32)
+    for i in range(n_terms - 1, -1, -1):
+        remaining[i] = remaining[i + 1] + max_score[query_terms[i]]
+
+    scores = np.zeros(num_docs, dtype=np.float32)
+    seen = np.zeros(num_docs, dtype=np.bool_)
+    candidates = np.empty(num_docs, dtype=np.int32)
+    n_cand = 0
+    threshold = np.float32(0.0)
+
+    # Essential terms: walk the full posting lists until the k-th best
+    # score dominates whatever the remaining terms could add to an unseen doc.
+    i = 0
+    while i < n_terms:
+        t = query_terms[i]
+        weight = idf[t] * (k1 + 1.0)
+        for j in range(term_offsets[t], term_offsets[t + 1]):
+            d = postings_doc[j]
+            tf = postings_tf[j]
+            scores[d] += weight * tf / (tf + doc_norm[d])
+            if not seen[d]:
+                seen[d] = True
+                candidates[n_cand] = d
+                n_cand += 1
+        i += 1
+
+        if n_cand >= k:
+            threshold = np.partition(scores[candidates[:n_cand]], n_cand - k)[n_cand - k]
+            if threshold >= remaining[i]:
+                break
+
+    # Non-essential terms: only existing candidates can still make the top-k,
+    # so look their tf up by binary search instead of reading the lists.
+    if i < n_terms:
+        for c in range(n_cand):
+            d = candidates[c]
+            for m in range(i, n_terms):
+                if scores[d] + remaining[m] < threshold:
+                    break
+                t = query_terms[m]
+                start = term_offsets[t]
+                end = term_offsets[t + 1]
+                pos = start + np.searchsorted(postings_doc[start:end], d)
+                if pos < end and postings_doc[pos] == d:
+                    tf = postings_tf[pos]
+                    scores[d] += idf[t] * (k1 + 1.0) * tf / (tf + doc_norm[d])
+
+    cand = candidates[:n_cand]
+    cand_scores = scores[cand]
+
+    # Partition down to the k-th best score before sorting, so only the
+    # winners (plus ties) are sorted instead of every candidate.
+    if n_cand > k:
+        kth = np.partition(cand_scores, n_cand - k)[n_cand - k]
+        keep = cand_scores >= kth
+        cand = cand[keep]
+        cand_scores = cand_scores[keep]
+    order = np.argsort(-cand_scores)[:k]
+    return cand[order], cand_scores[order]
+
+
+# =========================
+# BM25 Scorer
+# =========================
+class LexicalBM25:
+    """BM25 (Okapi) over the CSR posting arrays built by bm25_indexing.py"""
+
+    def __init__(self, index_dir, mmap_mode="r"):
+        # Memory-mapped by default: loading is near-instant, the OS pages in
+        # only the postings that queries touch, and worker processes share
+        # one read-only copy. Pass mmap_mode=None to read everything into RAM.
+        for name in INDEX_ARRAYS:
+            path = os.path.join(index_dir, f"{name}.npy")
+            setattr(self, name, np.load(path, mmap_mode=mmap_mode))
+
+        with open(os.path.join(index_dir, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+
+        with open(os.path.join(index_dir, "params.json"), "r", encoding="utf-8") as f:
+            params = json.load(f)
+
+        self.k1 = params["k1"]
+        self.b = params["b"]
+        self.avgdl = params["avgdl"]
+        self.corpus_size = params["num_docs"]
+
+        self.index_dir = index_dir
+        self._doc_term_scores = None
+
+    def term_ids(self, tokens):
+        """Map query tokens to term ids, dropping out-of-vocabulary tokens"""
+        ids = [self.vocab[t] for t in tokens if t in self.vocab]
+        return np.asarray(ids, dtype=np.int32)
+
+    def get_scores(self, tokens):
+        """Score every document for the query tokens (same contract as BM25Okapi)"""
+        scores = np.zeros(self.corpus_size, dtype=np.float32)
+        _accumulate_scores(
+            self.term_ids(tokens), self.term_offsets, self.postings_doc,
+            self.postings_tf, self.idf, self.doc_norm, np.float32(self.k1), scores
+        )
+        return scores
+
+    def get_top_k(self, tokens, k=10):
+        """Top-k (doc ids, scores) with MaxScore pruning; only docs matching a query term are returned"""
+        if k <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        ids = self.term_ids(tokens)
+        ids = ids[np.argsort(-self.max_score[ids], kind="stable")]
+        return _maxscore_top_k(
+            ids, k, self.term_offsets, self.postings_doc, self.postings_tf,
+            self.idf, self.doc_norm, self.max_score, np.float32(self.k1)
+        )
+
+    def get_scores_batch(self, queries):
+        """
+        Score every document for several tokenized queries at once.
+        Returns a (num_queries, num_docs) float32 array; row i equals
+        get_scores(queries[i]).
+        """
+        if self._doc_term_scores is None:
+            path = os.path.join(self.index_dir, "doc_term_scores.npz")
+            self._doc_term_scores = sparse.load_npz(path)
+
+        rows, cols = [], []
+        for q, tokens in enumerate(queries):
+            ids = self.term_ids(tokens)
+            rows.extend(ids)
+            cols.extend([q] * len(ids))
+
+        # Repeated query terms are summed, matching get_scores()
+        query_matrix = sparse.csc_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.vocab), len(queries))
+        )
+        return (self._doc_term_scores @ query_matrix).T.toarray()
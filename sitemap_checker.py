@@ -1,6 +1,47 @@
 # Create sitemap_checker.py
+from collections import Counter
+from io import BytesIO
+
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+
+PREVIEW_LOCS = 3
+
+
+def scan_sitemap(content):
+    """
+    Stream a sitemap once with lxml iterparse.
+
+    Returns (root tag, per-tag element counts, first <loc> values of
+    <sitemap> and of <url> entries). Finished entries are cleared as the
+    parse goes, so memory stays flat however many URLs the sitemap lists.
+    """
+    root = None
+    counts = Counter()
+    previews = {"sitemap": [], "url": []}
+
+    for event, elem in etree.iterparse(BytesIO(content), events=("start", "end"), recover=True):
+        tag = elem.tag.rpartition("}")[2]
+
+        if event == "start":
+            if root is None:
+                root = tag
+            continue
+
+        counts[tag] += 1
+
+        if tag == "loc":
+            parent = elem.getparent()
+            entry = parent.tag.rpartition("}")[2] if parent is not None else None
+            if entry in previews and len(previews[entry]) < PREVIEW_LOCS:
+                previews[entry].append(elem.text)
+
+        elif tag in previews:
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    return root, counts, previews
 
 
 def check_sitemap_directly():
@@ -12,16 +53,18 @@ def check_sitemap_directly():
         ("New Age", "https://www.newagebd.net/sitemap.xml"),
     ]
 
-    headers = {
+    # Reuse one keep-alive connection pool across all sites
+    session = requests.Session()
+    session.headers.update({
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+    })
 
     for site_name, url in sites:
         print(f"\nChecking: {site_name}")
         print(f"URL: {url}")
 
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = session.get(url, timeout=10)
             print(f"Status: {response.status_code}")
 
             if response.status_code == 200:
@@ -29,36 +72,29 @@ def check_sitemap_directly():
                 content = response.content[:1000]
                 print(f"First 1000 chars:\n{content.decode('utf-8', errors='ignore')}")
 
-                # Try to parse
-                soup = BeautifulSoup(response.content, 'xml')
+                # Stream-parse instead of building the whole document tree
+                root, counts, previews = scan_sitemap(response.content)
 
                 # Check what tags exist
-                print(f"\nRoot tag: {soup.find().name if soup.find() else 'None'}")
+                print(f"\nRoot tag: {root or 'None'}")
 
                 # Check for sitemapindex or urlset
-                if soup.find('sitemapindex'):
+                if counts["sitemapindex"]:
                     print("✓ This is a SITEMAP INDEX (contains links to other sitemaps)")
-                    sitemaps = soup.find_all('sitemap')
-                    print(f"  Contains {len(sitemaps)} child sitemaps")
-                    for i, sitemap in enumerate(sitemaps[:3]):
-                        loc = sitemap.find('loc')
-                        if loc:
-                            print(f"  {i + 1}. {loc.text}")
-
-                elif soup.find('urlset'):
+                    print(f"  Contains {counts['sitemap']} child sitemaps")
+                    for i, loc in enumerate(previews["sitemap"]):
+                        print(f"  {i + 1}. {loc}")
+
+                elif counts["urlset"]:
                     print("✓ This is a regular URL sitemap")
-                    urls = soup.find_all('url')
-                    print(f"  Contains {len(urls)} URLs")
-                    for i, url_tag in enumerate(urls[:3]):
-                        loc = url_tag.find('loc')
-                        if loc:
-                            print(f"  {i + 1}. {loc.text}")
+                    print(f"  Contains {counts['url']} URLs")
+                    for i, loc in enumerate(previews["url"]):
+                        print(f"  {i + 1}. {loc}")
 
                 else:
                     print("✗ Unknown sitemap format")
                     # Print all tags to understand structure
-                    all_tags = set([tag.name for tag in soup.find_all()])
-                    print(f"  Found tags: {all_tags}")
+                    print(f"  Found tags: {set(counts)}")
 
             else:
                 print(f"✗ Failed with status: {response.status_code}")